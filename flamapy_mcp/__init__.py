@@ -10,7 +10,15 @@ def main():
     logging_level = logging.WARN
 
     logging.basicConfig(level=logging_level, stream=sys.stderr)
-    asyncio.run(serve())
+
+    # uvloop, when installed, cuts the event loop's own overhead on every message
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(serve())
+        return
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        runner.run(serve())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE_GB = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+)
+"""
+
+
+class DiskCache:
+    """Persistent key/value store for JSON-serializable analysis results.
+
+    Entries live in a SQLite database so that several server processes can share it. When the
+    stored values grow beyond ``max_size_bytes`` the least recently used entries are dropped.
+    """
+
+    def __init__(self, directory: Path, max_size_bytes: int) -> None:
+        self.directory = directory
+        self.max_size_bytes = max_size_bytes
+        self.path = directory / "results.sqlite3"
+        # One connection per process, opened on first use and shared by its threads
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            # Write-ahead logging lets readers in other processes proceed during a write, and
+            # only the checkpoints (not every commit) wait for the data to reach the disk
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            try:
+                conn = self._connect()
+                with conn:
+                    yield conn
+            except sqlite3.Error:
+                # Reconnect on the next call rather than keep using a connection in a bad state
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+                raise
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value stored under key, or None if there is none"""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key, evicting old entries if the cache exceeds its size limit"""
+        data = json.dumps(value)
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time()))
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY accessed").fetchall():
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_size_bytes:
+                break
+
+
+def _default_cache_dir() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "flamapy-mcp"
+
+
+def cache_from_env() -> Optional[DiskCache]:
+    """Build the disk cache configured through the environment.
+
+    ``FLAMAPY_MCP_CACHE_DIR`` selects the cache directory (an empty value disables the cache) and
+    ``FLAMAPY_MCP_CACHE_MAX_SIZE_GB`` bounds its size.
+    """
+    directory = os.environ.get("FLAMAPY_MCP_CACHE_DIR")
+    if directory == "":
+        return None
+    max_size_gb = float(os.environ.get("FLAMAPY_MCP_CACHE_MAX_SIZE_GB", DEFAULT_MAX_SIZE_GB))
+    return DiskCache(Path(directory) if directory else _default_cache_dir(), int(max_size_gb * 1024 ** 3))
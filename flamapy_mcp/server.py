@@ -1,19 +1,78 @@
-import tempfile
-from pathlib import Path
+import asyncio
+import base64
+import csv
+import functools
+import hashlib
+import io
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from enum import Enum
+import anyio
+from antlr4 import CommonTokenStream, InputStream
+from uvl.UVLCustomLexer import UVLCustomLexer
+from uvl.UVLPythonParser import UVLPythonParser
+from flamapy.metamodels.bdd_metamodel.models import BDDModel
 from flamapy.metamodels.configuration_metamodel.models import Configuration
+from flamapy.metamodels.fm_metamodel.models import FeatureModel
+from flamapy.metamodels.fm_metamodel.transformations.uvl_reader import CustomErrorListener, UVLReader
 from flamapy.interfaces.python.flamapy_feature_model import FLAMAFeatureModel
 from flamapy.core.discover import DiscoverMetamodels
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from flamapy.core.exceptions import FlamaException, OperationNotFound
+from flamapy.core.models import VariabilityModel
+from pysat.solvers import Solver
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from typing import Annotated, List, Dict, Any, Iterator, Literal, Optional, Tuple
+
+from flamapy_mcp.disk_cache import cache_from_env
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
+from mcp.shared.exceptions import McpError
 from mcp.types import (
+    INTERNAL_ERROR,
+    INVALID_PARAMS,
+    ErrorData,
     TextContent,
     Tool,
 )
 
+try:
+    import orjson
+except ImportError:  # optional, installed with the "fast" extra
+    orjson = None
+
+
+# Largest UVL content accepted by the tools, in characters, rejected before any parsing
+_MAX_CONTENT_LENGTH = int(os.environ.get("FLAMAPY_MCP_MAX_CONTENT_LENGTH", 2_000_000))
+
+# Largest number of features accepted in a model, checked once it is parsed and before any analysis
+_MAX_FEATURES = int(os.environ.get("FLAMAPY_MCP_MAX_FEATURES", 10_000))
+
+# Models with at most this many features are compiled to a BDD, which answers the counting and
+# anomaly queries directly. Larger ones are analyzed with the SAT solver instead, since their
+# BDD may not fit in memory. FLAMAPY_MCP_USE_BDD=always|never overrides the limit. Models with
+# group cardinalities other than or and alternative never use the BDD (see _bdd_is_exact).
+_BDD_MAX_FEATURES = int(os.environ.get("FLAMAPY_MCP_BDD_MAX_FEATURES", 800))
+_USE_BDD = os.environ.get("FLAMAPY_MCP_USE_BDD", "auto")
+if _USE_BDD not in ("auto", "always", "never"):
+    raise ValueError(f"FLAMAPY_MCP_USE_BDD must be auto, always or never, not {_USE_BDD}")
+
+# Models without a BDD are counted by enumerating their configurations with the SAT solver, which
+# takes time proportional to their number; their counting analyses fail beyond this many
+_MAX_SAT_COUNT = int(os.environ.get("FLAMAPY_MCP_MAX_SAT_COUNT", 100_000))
+
+# Streams left open by clients that went away are dropped, least recently read first, beyond
+# this many per process
+_MAX_STREAMS = int(os.environ.get("FLAMAPY_MCP_MAX_STREAMS", 64))
+
 
 class FlamapyOperations(str, Enum):
     ATOMIC_SETS = "atomic_sets"
@@ -38,338 +97,1286 @@ class FlamapyOperations(str, Enum):
     UNIQUE_FEATURES = "unique_features"
     VARIABILITY = "variability"
     VARIANT_FEATURES = "variant_features"
+    ANALYZE_BATCH = "analyze_batch"
+    CONFIGURATIONS_STREAM = "configurations_stream"
+    COMMONALITY_MANY = "commonality_many"
+
+
+# Shared by every tool input: strict validation skips type coercion, and the string bound also
+# applies to the other text arguments
+_INPUT_CONFIG = ConfigDict(strict=True, extra="forbid", frozen=True, str_max_length=_MAX_CONTENT_LENGTH)
+
+_UVLText = Annotated[str, Field(max_length=_MAX_CONTENT_LENGTH,
+                               description="UVL (universal variability language) feature model content")]
 
 
 class UVLContent(BaseModel):
-    content: str = Field(description="UVL (universal variability language) feature model content")
+    model_config = _INPUT_CONFIG
+
+    content: _UVLText
 
 
 class UVLContentWithConfig(BaseModel):
-    content: str = Field(description="UVL (universal variability language) feature model content")
+    model_config = _INPUT_CONFIG
+
+    content: _UVLText
     config_file: str = Field(description="Configuration content or parameter (e.g., feature name, list of features).")
 
 
 class UVLContentWithSimpleConfig(BaseModel):
-    content: str = Field(description="UVL (universal variability language) feature model content")
+    model_config = _INPUT_CONFIG
+
+    content: _UVLText
     selected_features: List[str] = Field(
         description="A list of feature names to be considered 'selected' in the configuration.")
 
 
-def _create_temp_file(content: str, suffix: str = ".uvl") -> str:
-    """Create a temporary file with content and return its path"""
-    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix=suffix) as temp_file:
-        temp_file.write(content)
-        return temp_file.name
+class UVLContentWithFeatures(BaseModel):
+    model_config = _INPUT_CONFIG
 
+    content: _UVLText
+    features: List[str] = Field(description="Names of the features to analyze.")
+
+
+class UVLContentWithPage(BaseModel):
+    model_config = _INPUT_CONFIG
+
+    content: _UVLText
+    limit: int = Field(default=100, ge=1, description="Maximum number of configurations to return in this page.")
+    cursor: Optional[str] = Field(
+        default=None,
+        description="Cursor returned as next_cursor by the previous call, to continue from where it stopped.")
+    format: Literal["dict", "bitpacked"] = Field(
+        default="dict",
+        description="'dict' returns each configuration as a mapping of its selected features. 'bitpacked' returns "
+                    "the list of features once and each configuration as a base64 bit vector over that list.")
+
+
+class UVLContentWithOperations(BaseModel):
+    model_config = _INPUT_CONFIG
+
+    content: _UVLText
+    operations: List[str] = Field(
+        description="Names of the operations to run on the model. Any tool other than analyze_batch and "
+                    "configurations_stream is allowed.")
+    arguments: Dict[str, Dict[str, Any]] = Field(
+        default_factory=dict,
+        description="Extra arguments of the operations that take them, by operation name "
+                    "(e.g., {\"commonality\": {\"config_file\": \"FeatureA\"}}). The model content is shared.")
+
+
+class UVLContentWithStream(BaseModel):
+    model_config = _INPUT_CONFIG
+
+    content: _UVLText
+    chunk_size: int = Field(default=1000, ge=1, description="Number of configurations sent in each chunk.")
+    limit: Optional[int] = Field(
+        default=None, ge=1,
+        description="Maximum number of configurations to stream. By default all of them are sent when the request "
+                    "has a progress token, and a single chunk is returned otherwise.")
+
+
+logger = logging.getLogger(__name__)
+
+# Number of parsed feature models kept in memory between tool calls
+_MODEL_CACHE_SIZE = 64
+
+# Number of unsatisfiable cores remembered per model to reject configurations without solving
+_MAX_UNSAT_CORES = 1024
+
+# Metamodels framework operations are looked up in, following flamapy's plugin discovery order
+_FRAMEWORK_METAMODELS = ("fm", "bdd", "pysat")
+
+# Plugin discovery is done once per process. The registry is only read afterwards (each
+# get_operation call returns a fresh operation instance), so it is shared across requests.
+_DM = DiscoverMetamodels()
+
+# Results of the most expensive deterministic operations survive server restarts
+_disk_cache = cache_from_env()
+
+
+# Structural metrics of the feature tree, all gathered in a single traversal
+_TreeMetrics = namedtuple("_TreeMetrics", ["max_depth", "leaves", "leaf_count", "branching_factor", "parent_of",
+                                           "atomic_sets"])
+
+# Feature anomalies of the model, all found in a single pass over its SAT solver
+_FeatureAnomalies = namedtuple("_FeatureAnomalies", ["core_features", "dead_features", "false_optional_features"])
+
+
+def _bdd_is_exact(feature_model: FeatureModel) -> bool:
+    """Whether flamapy's BDD transformation encodes every relation of the model exactly.
+
+    It only gets mandatory, optional, or and alternative relations right: other group
+    cardinalities ([n..m] and [0..1] groups) let children be selected without their parent and
+    may force the parent in, so such models are counted and enumerated with the SAT solver.
+    """
+    return all(relation.is_mandatory() or relation.is_optional() or relation.is_or() or relation.is_alternative()
+               for relation in feature_model.get_relations())
+
+
+class _CachedModel:
+    """A parsed feature model together with the analysis results already computed on it"""
+
+    def __init__(self, fm: FLAMAFeatureModel, features: List[str]) -> None:
+        self.fm = fm
+        # Feature names in flamapy's order, as an ordered set
+        self.features: Dict[str, None] = dict.fromkeys(features)
+        self.use_bdd = _bdd_is_exact(fm.fm_model) and (
+            _USE_BDD == "always" or (_USE_BDD == "auto" and len(features) <= _BDD_MAX_FEATURES))
+        self.results: Dict[tuple, Any] = {}
+        self.tree_metrics: Optional[_TreeMetrics] = None
+        # Model counts on the BDD or the SAT solver, by selected feature (None for the whole model)
+        self.counts: Dict[Optional[str], int] = {}
+        # Number of configurations counted on the feature tree, for models without cross-tree constraints
+        self.tree_count: Optional[int] = None
+        # SAT solver loaded with the model clauses, reused for every configuration check
+        self.solver: Optional[Solver] = None
+        self.solver_lock = threading.Lock()
+        # Unsatisfiable subsets of assumptions found so far, least recently used first
+        self.unsat_cores: "OrderedDict[frozenset[int], None]" = OrderedDict()
+        self.anomalies: Optional[_FeatureAnomalies] = None
+        # Ancestors of the features asked for so far, by feature
+        self.ancestors: Dict[str, List[str]] = {}
+
+
+_model_cache: "OrderedDict[str, _CachedModel]" = OrderedDict()
+_model_cache_lock = threading.Lock()
+
+
+class _UVLStringReader(UVLReader):
+    """UVL reader that parses the model from a string instead of a file on disk"""
+
+    def __init__(self, content: str) -> None:
+        super().__init__("")
+        self.content = content
+
+    def set_parse_tree(self) -> None:
+        lexer = UVLCustomLexer(InputStream(self.content))
+        parser = UVLPythonParser(CommonTokenStream(lexer))
+
+        error_listener = CustomErrorListener()
+        parser.removeErrorListeners()
+        parser.addErrorListener(error_listener)
+
+        self.parse_tree = parser.featureModel()
+        if error_listener.errors:
+            raise FlamaException(f"Parsing failed due to syntax errors: {'; '.join(error_listener.errors)}")
+
+
+def _parse_fm(content: str) -> FeatureModel:
+    """Parse UVL content into a feature model without going through a temporary file"""
+    return _UVLStringReader(content).transform()
+
+
+def _facade_for(feature_model: FeatureModel) -> FLAMAFeatureModel:
+    """Wrap an already parsed feature model in the facade, bypassing its file-based constructor"""
+    fm = FLAMAFeatureModel.__new__(FLAMAFeatureModel)
+    fm.model_path = None
+    fm.discover_metamodel = _DM
+    fm.fm_model = feature_model
+    # The SAT and BDD models are built lazily by the facade on first use
+    fm.sat_model = None
+    fm.bdd_model = None
+    return fm
+
+
+# Digests of the last contents hashed, with the content strings themselves
+_recent_hashes: "deque[Tuple[str, str]]" = deque(maxlen=4)
+_recent_hashes_lock = threading.Lock()
 
-def _cleanup_temp_file(file_path: str):
-    """Clean up temporary file"""
-    try:
-        Path(file_path).unlink()
-    except Exception:
-        pass
 
+def _content_hash(content: str) -> str:
+    """Content address of a UVL model, used as the key of the model and disk caches.
 
-def _run_facade_operation(content: str, operation_method: str, *args) -> Any:
+    A request looks its model up many times (once per counted feature, for instance), always
+    with the same string object. The digests of the last few contents are found by identity,
+    so those lookups cost no BLAKE2b pass while only a handful of contents are kept alive.
+    """
+    with _recent_hashes_lock:
+        for recent_content, digest in _recent_hashes:
+            if recent_content is content:
+                return digest
+    digest = hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+    with _recent_hashes_lock:
+        _recent_hashes.append((content, digest))
+    return digest
+
+
+def _get_model(content: str) -> _CachedModel:
+    """Return the cache entry for the given UVL content, parsing it only on a cache miss.
+
+    The cached facade keeps the SAT and BDD models it builds lazily, so they are also
+    shared by every later call on the same content. Evicting a model drops its results too.
+    """
+    key = _content_hash(content)
+    with _model_cache_lock:
+        model = _model_cache.get(key)
+        if model is not None:
+            _model_cache.move_to_end(key)
+            return model
+
+    # Parse outside the lock so that concurrent calls on other models are not serialized
+    feature_model = _parse_fm(content)
+    features = [feature.name for feature in feature_model.get_features()]
+    if len(features) > _MAX_FEATURES:
+        raise ValueError(f"The model has {len(features)} features, more than the {_MAX_FEATURES} allowed")
+    model = _CachedModel(_facade_for(feature_model), features)
+    with _model_cache_lock:
+        model = _model_cache.setdefault(key, model)
+        _model_cache.move_to_end(key)
+        while len(_model_cache) > _MODEL_CACHE_SIZE:
+            _model_cache.popitem(last=False)
+    return model
+
+
+def _get_fm(content: str) -> FLAMAFeatureModel:
+    """Return the (cached) facade for the given UVL content"""
+    return _get_model(content).fm
+
+
+def _cached_result(func):
+    """Memoize an operation runner per model, keyed by the operation name and its arguments.
+
+    Only wrap runners for deterministic operations whose arguments identify the query
+    (feature names, flags), never ones that receive temporary file paths.
+    """
+    @functools.wraps(func)
+    def wrapper(content: str, operation: str, *args, **kwargs) -> Any:
+        results = _get_model(content).results
+        key = (operation, args, tuple(sorted(kwargs.items())))
+        if key not in results:
+            results[key] = func(content, operation, *args, **kwargs)
+        return results[key]
+
+    return wrapper
+
+
+def _execute_facade_operation(content: str, operation_method: str, *args) -> Any:
     """Run operation using the simple facade interface"""
-    temp_file = _create_temp_file(content)
-    try:
-        fm = FLAMAFeatureModel(temp_file)
-        method = getattr(fm, operation_method)
-        result = method(*args)
-        return result
-    except Exception as e:
-        raise Exception(f"Error executing {operation_method}: {str(e)}")
-    finally:
-        _cleanup_temp_file(temp_file)
+    fm = _get_fm(content)
+    method = getattr(fm, operation_method)
+    return method(*args)
 
 
+@functools.cache
+def _metamodel_for_operation(operation_name: str) -> str:
+    """Extension of the first metamodel implementing the operation, resolved once per operation"""
+    for extension in _FRAMEWORK_METAMODELS:
+        plugin = _DM.plugins.get_plugin_by_extension(extension)
+        if operation_name in _DM.get_name_operations_by_plugin(plugin.name):
+            return extension
+    raise OperationNotFound(operation_name)
+
+
+def _model_for_operation(fm: FLAMAFeatureModel, operation_name: str) -> VariabilityModel:
+    """Return the cached model of the first metamodel implementing the operation.
+
+    The SAT and BDD models are transformed once by the facade and then shared by every
+    operation on the same feature model, instead of being rebuilt by each framework call.
+    """
+    extension = _metamodel_for_operation(operation_name)
+    if extension == "pysat":
+        fm._transform_to_sat()
+        return fm.sat_model
+    if extension == "bdd":
+        return _compile_bdd(fm)
+    return fm.fm_model
+
+
+@_cached_result
 def _run_framework_operation(content: str, operation_name: str, **kwargs) -> Any:
     """Run operation using the core framework interface with optional parameters"""
-    temp_file = _create_temp_file(content)
+    fm = _get_fm(content)
+    model = _model_for_operation(fm, operation_name)
+    op = _DM.get_operation(model, operation_name)
+
+    # Set parameters if any were passed
+    for key, value in kwargs.items():
+        if hasattr(op, key):
+            setattr(op, key, value)
+
+    op.execute(model)
+    return op.get_result()
+
+
+def _compile_bdd(fm: FLAMAFeatureModel) -> BDDModel:
+    """Return the BDD of a facade, compiling it on first use with its variables in feature order.
+
+    flamapy sifts the variables of a new BDD in an order that follows the hash seed of the
+    process. Putting them back in the order of the features makes the BDD, and so the order its
+    configurations are enumerated in, the same in every process.
+    """
+    if fm.bdd_model is None:
+        fm._transform_to_bdd()
+        bdd_model = fm.bdd_model
+        bdd_model.bdd.reorder({variable: level for level, variable in enumerate(bdd_model.variables_features)})
+        bdd_model._levels_variables = {level: variable for variable, level in bdd_model.bdd.var_levels.items()}
+    return fm.bdd_model
+
+
+def _get_bdd(content: str) -> BDDModel:
+    """Return the BDD of the given UVL content, compiled once and kept with the cached model"""
+    return _compile_bdd(_get_fm(content))
+
+
+def _count(content: str, feature: Optional[str] = None) -> int:
+    """Number of configurations of the model, or of those including feature, memoized per model.
+
+    The counting queries reading per-feature counts (inclusion probabilities, homogeneity,
+    commonality, variant and unique features) are answered from these counts, so each one is
+    computed at most once per model. The total and the per-feature counts always come from the
+    same source: the BDD, or a single enumeration with the SAT solver for models not using it.
+    """
+    model = _get_model(content)
+    counts = model.counts
+    if feature not in counts and not model.use_bdd:
+        counts.update(_sat_counts(model))
+    if feature not in counts:
+        bdd_model = _get_bdd(content)
+        n_vars = len(bdd_model.variables_features)
+        if feature is None:
+            counts[feature] = int(bdd_model.bdd.count(bdd_model.root, nvars=n_vars))
+        else:
+            u_func = bdd_model.bdd.let({bdd_model.features_variables[feature]: True}, bdd_model.root)
+            counts[feature] = int(bdd_model.bdd.count(u_func, nvars=n_vars - 1))
+    return counts[feature]
+
+
+def _configurations_number(content: str) -> int:
+    """Number of configurations of the model, counted on the feature tree when it has no cross-tree constraints.
+
+    The tree count takes linear time and compiles no BDD, but it is only used where no
+    per-feature count is read alongside it; those come from _count, with its own total.
+    """
+    model = _get_model(content)
+    feature_model = model.fm.fm_model
+    if feature_model.get_constraints():
+        return _count(content)
+    if model.tree_count is None:
+        model.tree_count = _tree_count(feature_model)
+    return model.tree_count
+
+
+def _sat_solutions(model: _CachedModel) -> Iterator[List[str]]:
+    """Lazily enumerate the configurations of a model with a SAT solver, as lists of their selected features.
+
+    Each solution is blocked on the feature variables only, so solutions differing just in
+    auxiliary variables of the CNF are yielded once. The CNF and the solver are deterministic,
+    so the configurations always come in the same order.
+    """
+    fm = model.fm
+    fm._transform_to_sat()
+    feature_of = {variable: feature for feature, variable in fm.sat_model.variables.items()}
+    # A solver of its own, since the blocking clauses must not reach the model's shared solver
+    with Solver(name='glucose3', bootstrap_with=fm.sat_model.get_all_clauses()) as solver:
+        while solver.solve():
+            blocking_clause = []
+            selected = []
+            for literal in solver.get_model():
+                feature = feature_of.get(abs(literal))
+                if feature is not None:
+                    blocking_clause.append(-literal)
+                    if literal > 0:
+                        selected.append(feature)
+            solver.add_clause(blocking_clause)
+            yield selected
+
+
+def _sat_counts(model: _CachedModel) -> Dict[Optional[str], int]:
+    """Count the configurations of a model, in total and by feature, enumerating them with a SAT solver.
+
+    The enumeration is abandoned past _MAX_SAT_COUNT configurations rather than left to run
+    for a time exponential in the size of the model.
+    """
+    counts: Dict[Optional[str], int] = dict.fromkeys(model.features, 0)
+    total = 0
+    for selected in _sat_solutions(model):
+        if total == _MAX_SAT_COUNT:
+            raise ValueError(f"The model has more than {_MAX_SAT_COUNT} configurations, too many to count "
+                             "without a BDD")
+        for feature in selected:
+            counts[feature] += 1
+        total += 1
+    counts[None] = total
+    return counts
+
+
+def _feature_counts(content: str) -> Dict[str, int]:
+    """Number of configurations including each feature of the model"""
+    return {feature: _count(content, feature) for feature in _get_model(content).features}
+
+
+def _inclusion_probabilities(content: str) -> Dict[str, float]:
+    """Probability of each feature being selected in a valid configuration"""
+    total = _count(content)
+    if total == 0:
+        return {feature: 0.0 for feature in _get_model(content).features}
+    return {feature: count / total for feature, count in _feature_counts(content).items()}
+
+
+@_cached_result
+def _count_statistic(content: str, operation: str) -> Any:
+    """Statistics derived from the model counts, computed and rounded once per model rather than per call"""
+    match operation:
+        case FlamapyOperations.FEATURE_INCLUSION_PROBABILITY:
+            probabilities = _inclusion_probabilities(content)
+            # Rounded with map/zip so the loop over features runs in C rather than in a comprehension
+            return dict(zip(probabilities, map(round, probabilities.values(), itertools.repeat(4))))
+        case FlamapyOperations.HOMOGENEITY:
+            probabilities = _inclusion_probabilities(content)
+            return sum(probabilities.values()) / len(probabilities)
+        case FlamapyOperations.UNIQUE_FEATURES:
+            return [feature for feature, count in _feature_counts(content).items() if count == 1]
+        case FlamapyOperations.VARIABILITY:
+            # Shares of the combinations of all the features, and of the variant features only, that
+            # are valid configurations, as flamapy's Variability. Being tiny for any real model, they
+            # are not rounded. Without variant features there is no combination to share (flamapy
+            # divides by zero there).
+            total_combinations = 2 ** len(_get_model(content).features) - 1
+            variant_combinations = 2 ** len(_count_statistic(content, FlamapyOperations.VARIANT_FEATURES)) - 1
+            return {
+                "total_variability": _configurations_number(content) / total_combinations,
+                "partial_variability": _count(content) / variant_combinations if variant_combinations else 0.0,
+            }
+        case FlamapyOperations.VARIANT_FEATURES:
+            return [feature for feature, prob in _inclusion_probabilities(content).items() if 0.0 < prob < 1.0]
+    raise ValueError(f"Unknown count statistic: {operation}")
+
+
+def _solver_for(model: _CachedModel) -> Solver:
+    """Return the SAT solver of a cached model, loading the model clauses on first use.
+
+    The solver is stateful, so callers must hold the model's solver_lock while using it.
+    """
+    if model.solver is None:
+        fm = model.fm
+        fm._transform_to_sat()
+        model.solver = Solver(name='glucose3', bootstrap_with=fm.sat_model.get_all_clauses())
+    return model.solver
+
+
+def _find_anomalies(solver: Solver, variables: Dict[str, int], feature_model: FeatureModel) -> _FeatureAnomalies:
+    """Find the core, dead and false-optional features with as few solver calls as possible.
+
+    Every solution found along the way is kept as a witness: a feature selected in some
+    solution cannot be dead and one deselected in some solution cannot be core, so those
+    features need no solver call of their own. Results follow flamapy's feature order.
+    """
+    selected, deselected = set(), set()
+
+    def solve(assumptions: List[int]) -> bool:
+        if not solver.solve(assumptions=assumptions):
+            return False
+        for literal in solver.get_model():
+            (selected if literal > 0 else deselected).add(abs(literal))
+        return True
+
+    satisfiable = solve([])
+    core_features = []
+    if satisfiable:
+        core_features = [name for name, variable in variables.items()
+                         if variable not in deselected and not solve([-variable])]
+    dead_features = [name for name, variable in variables.items()
+                     if variable not in selected and not solve([variable])]
+
+    core = set(core_features)
+    false_optional_features = []
+    for feature in feature_model.get_features():
+        parent = feature.get_parent()
+        if feature.is_root() or feature.is_mandatory() or parent is None:
+            continue
+        if satisfiable and feature.name in core:
+            false_optional_features.append(feature.name)
+        elif satisfiable and parent.name in core:
+            continue
+        elif not solve([variables[parent.name], -variables[feature.name]]):
+            false_optional_features.append(feature.name)
+    return _FeatureAnomalies(core_features, dead_features, false_optional_features)
+
+
+def _counted_anomalies(content: str) -> _FeatureAnomalies:
+    """Find the core, dead and false-optional features from the memoized counts of the model.
+
+    A core feature is in every configuration and a dead one in none. A feature implies its
+    parent, so an optional feature is false-optional when it is in every configuration its
+    parent is in, i.e. when both are in the same number of configurations.
+    """
+    total = _count(content)
+    counts = _feature_counts(content)
+    core_features = [feature for feature, count in counts.items() if total and count == total]
+    dead_features = [feature for feature, count in counts.items() if count == 0]
+    false_optional_features = [
+        feature.name for feature in _get_model(content).fm.fm_model.get_features()
+        if not feature.is_root() and not feature.is_mandatory() and feature.get_parent() is not None
+        and counts[feature.name] == counts[feature.get_parent().name]]
+    return _FeatureAnomalies(core_features, dead_features, false_optional_features)
+
+
+def _get_anomalies(content: str) -> _FeatureAnomalies:
+    """Return the (cached) core, dead and false-optional features of the given UVL content.
+
+    Models compiled to a BDD read them from their counts, the others ask the SAT solver.
+    """
+    model = _get_model(content)
+    if model.use_bdd:
+        if model.anomalies is None:
+            model.anomalies = _counted_anomalies(content)
+        return model.anomalies
+    with model.solver_lock:
+        if model.anomalies is None:
+            solver = _solver_for(model)
+            model.anomalies = _find_anomalies(solver, model.fm.sat_model.variables, model.fm.fm_model)
+        return model.anomalies
+
+
+def _is_satisfiable_configuration(content: str, selected_features: List[str]) -> bool:
+    """Check whether a partial configuration selecting the given features can be completed.
+
+    The model clauses are loaded once into a solver kept with the cached model, and each check
+    only solves under the selected features as assumptions. The unsatisfiable cores of failed
+    checks are remembered, so any later selection containing one of them is rejected at once.
+    """
+    model = _get_model(content)
+    fm = model.fm
+    fm._transform_to_sat()
+    variables = fm.sat_model.variables
+    unknown = [feature for feature in selected_features if feature not in variables]
+    if unknown:
+        raise ValueError(f"Unknown features: {', '.join(unknown)}")
+
+    assumptions = [variables[feature] for feature in selected_features]
+    with model.solver_lock:
+        literals = set(assumptions)
+        for core in model.unsat_cores:
+            if core <= literals:
+                model.unsat_cores.move_to_end(core)
+                return False
+
+        if _solver_for(model).solve(assumptions=assumptions):
+            return True
+
+        core = model.solver.get_core()
+        if core is not None:
+            model.unsat_cores[frozenset(core)] = None
+            while len(model.unsat_cores) > _MAX_UNSAT_CORES:
+                model.unsat_cores.popitem(last=False)
+        return False
+
+
+def _is_satisfiable(content: str) -> bool:
+    """Whether the model has any valid configuration, without a solver call when it can be counted cheaply.
+
+    A model without cross-tree constraints is counted on its feature tree in linear time (only
+    group cardinalities its children cannot meet make it void), and one with a BDD from its count.
+    """
+    model = _get_model(content)
+    if not model.fm.fm_model.get_constraints():
+        return _configurations_number(content) > 0
+    if model.use_bdd:
+        return _count(content) > 0
+    # The empty configuration, checked on the model's cached solver
+    return _is_satisfiable_configuration(content, [])
+
+
+def _commonality(content: str, feature: str) -> float:
+    """Share of the valid configurations that include feature, from two memoized model counts"""
+    if feature not in _get_model(content).features:
+        raise ValueError(f"Unknown feature: {feature}")
+    total = _count(content)
+    return _count(content, feature) / total if total else 0.0
+
+
+def _commonality_many(content: str, features: List[str]) -> Dict[str, float]:
+    """Commonality of each of the given features, sharing the model total and the memoized counts"""
+    features_of_model = _get_model(content).features
+    unknown = [feature for feature in features if feature not in features_of_model]
+    if unknown:
+        raise ValueError(f"Unknown features: {', '.join(unknown)}")
+    return {feature: _commonality(content, feature) for feature in features}
+
+
+def _parse_configuration(config_content: str) -> Configuration:
+    """Parse csvconf content (feature,true|false rows) from memory, as flamapy's reader does from a file"""
+    rows = csv.reader(io.StringIO(config_content))
+    return Configuration({row[0]: row[1].lower() == 'true' for row in rows if row})
+
+
+def _filter(content: str, config_content: str) -> List[List[Any]]:
+    """Return the configurations of the model that extend the given partial configuration"""
+    fm = _get_fm(content)
+    fm._transform_to_sat()
+    operation = _DM.get_operation(fm.sat_model, 'PySATFilter')
+    operation.set_configuration(_parse_configuration(config_content))
+    operation.execute(fm.sat_model)
+    return operation.get_result()
+
+
+def _iter_configurations(content: str) -> Iterator[Dict[str, bool]]:
+    """Lazily enumerate the valid configurations of the model, from its cached BDD if it uses one.
+
+    Each configuration is yielded as the mapping of its selected features, the same data as
+    flamapy's Configuration.elements, without building the Configuration objects themselves.
+    Models without a BDD (too large, or with group cardinalities it would not encode exactly)
+    are enumerated with the SAT solver instead, so no BDD is ever compiled for them.
+    """
+    model = _get_model(content)
+    if not model.use_bdd:
+        for selected in _sat_solutions(model):
+            yield dict.fromkeys(selected, True)
+        return
+
+    yield from _bdd_configurations(_get_bdd(content))
+
+
+def _bdd_configurations(bdd_model: BDDModel) -> Iterator[Dict[str, bool]]:
+    """Enumerate the configurations of a BDD in feature order, each feature deselected before selected.
+
+    dd's pick_iter lists the values of skipped variables in a hash-seeded order, so the BDD is
+    walked here with an explicit stack instead, over the nodes of its low-level manager. A
+    negative reference stands for the complement of its node, whose children are complemented.
+    """
+    manager = bdd_model.bdd._bdd
+    n_vars = len(bdd_model.variables_features)
+    features = [bdd_model.variables_features[bdd_model.var_at_level(level)] for level in range(n_vars)]
+    selected = [False] * n_vars
+    # Nodes still to visit, with the level they assign next and the value they give the level above
+    stack = [(bdd_model.root.node, 0, False)]
+    while stack:
+        node, level, value = stack.pop()
+        if level:
+            selected[level - 1] = value
+        if node == -1:
+            continue
+        if level == n_vars:
+            yield {feature: True for feature, is_selected in zip(features, selected) if is_selected}
+            continue
+        node_level, low, high = manager.succ(node)
+        if node_level > level:
+            # The variable at this level does not appear on the path, both values are valid
+            low = high = node
+        elif node < 0:
+            low, high = -low, -high
+        stack.append((high, level + 1, True))
+        stack.append((low, level + 1, False))
+
+
+def _bitpacked(configurations: List[Dict[str, bool]], features: List[str]) -> List[str]:
+    """Encode each configuration as base64 of a little-endian bit vector, bit i standing for features[i]"""
+    bit_of = {feature: 1 << index for index, feature in enumerate(features)}
+    n_bytes = (len(features) + 7) // 8
+    return [base64.b64encode(sum(map(bit_of.__getitem__, configuration)).to_bytes(n_bytes, "little")).decode()
+            for configuration in configurations]
+
+
+def _configurations_page(content: str, limit: int, cursor: Optional[str], format: str = "dict") -> Dict[str, Any]:
+    """Return one page of configurations and the cursor of the next page (None after the last one).
+
+    Configurations are enumerated lazily, so a page costs time proportional to its offset and
+    limit and memory proportional to its limit, however many configurations the model has.
+    In the bitpacked format each configuration takes one bit per feature of the model instead
+    of one dictionary entry per selected feature.
+    """
+    if cursor is None:
+        offset = 0
+    elif cursor.isdigit():
+        offset = int(cursor)
+    else:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    # One configuration past the page tells whether another page follows
+    page = list(itertools.islice(_iter_configurations(content), offset, offset + limit + 1))
+    next_cursor = str(offset + limit) if len(page) > limit else None
+    if format == "bitpacked":
+        features = [feature.name for feature in _get_fm(content).fm_model.get_features()]
+        return {"features": features, "configurations": _bitpacked(page[:limit], features), "next_cursor": next_cursor}
+    return {"configurations": page[:limit], "next_cursor": next_cursor}
+
+
+def _to_json(value: Any) -> str:
+    """Serialize a result as JSON text, with orjson when it is installed.
+
+    Objects JSON has no type for (e.g., flamapy configurations) are written as their string form.
+    orjson rejects integers beyond 64 bits, such as the configuration counts of large models,
+    so results holding one are serialized by the json module instead.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=str).decode()
+        except TypeError:
+            pass
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+# Configuration iterators of the streams in progress in this process, by stream id, least
+# recently read first
+_streams: "OrderedDict[str, Iterator[Dict[str, bool]]]" = OrderedDict()
+_stream_ids = itertools.count()
+
+
+def _stream_chunk(content: str, stream_id: str, size: int, start: bool) -> Tuple[str, bool]:
+    """Pull the next configurations of a stream, as JSON lines, and tell whether it is exhausted.
+
+    The stream keeps its configuration iterator between chunks, so each chunk continues the
+    enumeration instead of skipping the configurations already sent. The first chunk (start)
+    opens the stream; a later one fails if the stream was dropped to make room for others.
+    """
+    if start:
+        configurations = _streams[stream_id] = _iter_configurations(content)
+        while len(_streams) > _MAX_STREAMS:
+            _streams.popitem(last=False)
+    else:
+        configurations = _streams.get(stream_id)
+        if configurations is None:
+            raise ValueError(f"Configurations stream {stream_id} expired, too many streams were open")
+        _streams.move_to_end(stream_id)
+    chunk = list(itertools.islice(configurations, size))
+    exhausted = len(chunk) < size
+    if exhausted:
+        del _streams[stream_id]
+    return "".join(_to_json({"cfg": configuration}) + "\n" for configuration in chunk), exhausted
+
+
+def _close_stream(content: str, stream_id: str) -> None:
+    """Drop a stream that will not be read to the end"""
+    _streams.pop(stream_id, None)
+
+
+def _tree_metrics(feature_model: FeatureModel) -> _TreeMetrics:
+    """Compute the structural metrics of the feature tree in one pass.
+
+    Besides the depth, leaves and average branching factor, the traversal records the parent of
+    each feature and groups the features into atomic sets: a mandatory child always shares the
+    set of its parent, any other child starts a new one. The iterative DFS visits relations in
+    the same order as FeatureModel.get_features(), so the leaves are listed as flamapy lists them,
+    and deep models do not hit the recursion limit.
+    """
+    root = feature_model.root
+    leaves = [] if root.get_relations() else [root.name]
+    max_depth = 0
+    branches = 1 if root.get_relations() else 0
+    children = sum(len(relation.children) for relation in root.get_relations())
+    parent_of: Dict[str, Optional[str]] = {root.name: None}
+    atomic_set_of = {root.name: [root.name]}
+    atomic_sets = [atomic_set_of[root.name]]
+
+    stack = [(relation, 1) for relation in reversed(root.get_relations())]
+    while stack:
+        relation, depth = stack.pop()
+        parent = relation.parent.name
+        for child in relation.children:
+            parent_of[child.name] = parent
+            if relation.is_mandatory():
+                atomic_set = atomic_set_of[parent]
+                atomic_set.append(child.name)
+            else:
+                atomic_set = [child.name]
+                atomic_sets.append(atomic_set)
+            atomic_set_of[child.name] = atomic_set
+
+            relations = child.get_relations()
+            if relations:
+                branches += 1
+                children += sum(len(child_relation.children) for child_relation in relations)
+            else:
+                leaves.append(child.name)
+                max_depth = max(max_depth, depth)
+        for child in reversed(relation.children):
+            stack.extend((child_relation, depth + 1) for child_relation in reversed(child.get_relations()))
+
+    branching_factor = round(children / branches, 2) if branches else 0.0
+    return _TreeMetrics(max_depth, leaves, len(leaves), branching_factor, parent_of, atomic_sets)
+
+
+def _feature_ancestors(content: str, feature: str) -> List[str]:
+    """Return the ancestors of feature, from its parent up to the root, memoized per model"""
+    model = _get_model(content)
+    if feature not in model.ancestors:
+        parent_of = _get_tree_metrics(content).parent_of
+        if feature not in parent_of:
+            raise ValueError(f"Unknown feature: {feature}")
+        ancestors = []
+        parent = parent_of[feature]
+        while parent is not None:
+            ancestors.append(parent)
+            parent = parent_of[parent]
+        model.ancestors[feature] = ancestors
+    return model.ancestors[feature]
+
+
+def _tree_count(feature_model: FeatureModel) -> int:
+    """Count the configurations of a model without cross-tree constraints in linear time.
+
+    Features are counted bottom-up with an explicit stack. Each relation of a feature allows
+    between card_min and card_max of its children, so it contributes the elementary symmetric
+    sums of the children counts in that range, built incrementally child by child.
+    """
+    counts: Dict[str, int] = {}
+    stack = [(feature_model.root, False)]
+    while stack:
+        feature, expanded = stack.pop()
+        relations = feature.get_relations()
+        if not expanded:
+            stack.append((feature, True))
+            stack.extend((child, False) for relation in relations for child in relation.children)
+            continue
+
+        count = 1
+        for relation in relations:
+            card_max = min(relation.card_max, len(relation.children))
+            # ways[k] is the number of ways of selecting exactly k of the children seen so far
+            ways = [1] + [0] * card_max
+            for child in relation.children:
+                child_count = counts.pop(child.name)
+                for k in range(card_max, 0, -1):
+                    ways[k] += ways[k - 1] * child_count
+            count *= sum(ways[relation.card_min:])
+        counts[feature.name] = count
+    return counts[feature_model.root.name]
+
+
+def _get_tree_metrics(content: str) -> _TreeMetrics:
+    """Return the (cached) tree metrics of the given UVL content"""
+    model = _get_model(content)
+    if model.tree_metrics is None:
+        model.tree_metrics = _tree_metrics(model.fm.fm_model)
+    return model.tree_metrics
+
+
+# Expensive operations depending only on the model content, whose results are kept on disk
+_PERSISTED_OPERATIONS = frozenset({
+    FlamapyOperations.CONFIGURATIONS_NUMBER,
+    FlamapyOperations.FEATURE_INCLUSION_PROBABILITY,
+    FlamapyOperations.HOMOGENEITY,
+    FlamapyOperations.SAMPLING,
+})
+
+# Version of the persisted results, part of their keys. Bump it whenever one of these operations
+# changes its result, so the results stored by an older release are not served anymore.
+_RESULT_FORMAT_VERSION = 2
+
+# Tools handled by the server process itself rather than run as a single analysis
+_UNBATCHED_OPERATIONS = frozenset({
+    FlamapyOperations.ANALYZE_BATCH,
+    FlamapyOperations.CONFIGURATIONS_STREAM,
+})
+
+# Input model of each tool, used both for its JSON schema and to validate its arguments
+_TOOL_INPUTS: Dict[str, type[BaseModel]] = {
+    FlamapyOperations.ATOMIC_SETS: UVLContent,
+    FlamapyOperations.AVERAGE_BRANCHING_FACTOR: UVLContent,
+    FlamapyOperations.COMMONALITY: UVLContentWithConfig,
+    FlamapyOperations.CONFIGURATIONS: UVLContentWithPage,
+    FlamapyOperations.CONFIGURATIONS_NUMBER: UVLContent,
+    FlamapyOperations.CORE_FEATURES: UVLContent,
+    FlamapyOperations.COUNT_LEAFS: UVLContent,
+    FlamapyOperations.DEAD_FEATURES: UVLContent,
+    FlamapyOperations.ESTIMATED_NUMBER_OF_CONFIGURATIONS: UVLContent,
+    FlamapyOperations.FALSE_OPTIONAL_FEATURES: UVLContent,
+    FlamapyOperations.FEATURE_ANCESTORS: UVLContentWithConfig,
+    FlamapyOperations.FEATURE_INCLUSION_PROBABILITY: UVLContent,
+    FlamapyOperations.FILTER: UVLContentWithConfig,
+    FlamapyOperations.HOMOGENEITY: UVLContent,
+    FlamapyOperations.LEAF_FEATURES: UVLContent,
+    FlamapyOperations.MAX_DEPTH: UVLContent,
+    FlamapyOperations.SAMPLING: UVLContent,
+    FlamapyOperations.SATISFIABILITY: UVLContent,
+    FlamapyOperations.SATISFIABLE_CONFIGURATION: UVLContentWithSimpleConfig,
+    FlamapyOperations.UNIQUE_FEATURES: UVLContent,
+    FlamapyOperations.VARIABILITY: UVLContent,
+    FlamapyOperations.VARIANT_FEATURES: UVLContent,
+    FlamapyOperations.ANALYZE_BATCH: UVLContentWithOperations,
+    FlamapyOperations.CONFIGURATIONS_STREAM: UVLContentWithStream,
+    FlamapyOperations.COMMONALITY_MANY: UVLContentWithFeatures,
+}
+
+# JSON schemas of the tool inputs, derived once from the pydantic models at import time
+_INPUT_SCHEMAS: Dict[type[BaseModel], Dict[str, Any]] = {
+    model: model.model_json_schema() for model in set(_TOOL_INPUTS.values())
+}
+
+# Tools advertised by the server; the list is built once and returned as is by list_tools
+_TOOLS: List[Tool] = [
+    Tool(
+        name=FlamapyOperations.ATOMIC_SETS,
+        description="Identifies atomic sets, which are groups of features that always appear together in all valid configurations.",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.AVERAGE_BRANCHING_FACTOR,
+        description="Calculates the average number of child features per parent feature, indicating model complexity.",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.COMMONALITY,
+        description="Measures the frequency of a feature in valid configurations, expressed as a percentage.",
+        inputSchema=_INPUT_SCHEMAS[UVLContentWithConfig]
+    ),
+    Tool(
+        name=FlamapyOperations.CONFIGURATIONS,
+        description="Generates the valid configurations of the feature model, one page of at most limit configurations at a time. Returns the page and the cursor of the next one (null after the last page).",
+        inputSchema=_INPUT_SCHEMAS[UVLContentWithPage]
+    ),
+    Tool(
+        name=FlamapyOperations.CONFIGURATIONS_NUMBER,
+        description="Returns the total number of valid configurations for the feature model. Models without cross-tree constraints are counted in linear time from the feature tree.",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.CORE_FEATURES,
+        description="Identifies features that are present in all valid configurations (mandatory features).",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.COUNT_LEAFS,
+        description="Counts the number of leaf features (features with no children) in the model.",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.DEAD_FEATURES,
+        description="Identifies features that cannot be included in any valid configuration, often indicating model errors.",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.ESTIMATED_NUMBER_OF_CONFIGURATIONS,
+        description="Estimates the total number of configurations by considering all feature combinations, ignoring constraints.",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.FALSE_OPTIONAL_FEATURES,
+        description="Identifies features that seem optional but are mandatory due to model constraints.",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.FEATURE_ANCESTORS,
+        description="Returns all ancestor features for a given feature in the model hierarchy.",
+        inputSchema=_INPUT_SCHEMAS[UVLContentWithConfig]
+    ),
+    Tool(
+        name=FlamapyOperations.FEATURE_INCLUSION_PROBABILITY,
+        description="Calculates the probability of each feature being included in a random valid configuration.",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.FILTER,
+        description="Filters and selects a subset of configurations based on specified criteria.",
+        inputSchema=_INPUT_SCHEMAS[UVLContentWithConfig]
+    ),
+    Tool(
+        name=FlamapyOperations.HOMOGENEITY,
+        description="Measures the similarity of configurations. A higher value (closer to 1) indicates more similar configurations.",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.LEAF_FEATURES,
+        description="Identifies all leaf features in the model (features with no children).",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.MAX_DEPTH,
+        description="Finds the maximum depth of the feature tree, indicating the longest path from root to leaf.",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.SAMPLING,
+        description="Generates a sample of valid configurations from the feature model.",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.SATISFIABILITY,
+        description="Checks if the feature model is valid and can produce at least one valid configuration.",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.SATISFIABLE_CONFIGURATION,
+        description="Checks if a given configuration of selected features is valid according to the model's constraints.",
+        inputSchema=_INPUT_SCHEMAS[UVLContentWithSimpleConfig]
+    ),
+    Tool(
+        name=FlamapyOperations.UNIQUE_FEATURES,
+        description="Identifies features that are part of a unique variability point.",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.VARIABILITY,
+        description="Calculates the total variability (the ratio of valid configurations to all possible combinations of the features) and the partial variability (the same ratio over the combinations of the variant features only).",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.VARIANT_FEATURES,
+        description="Identifies features that are neither core nor dead (i.e., truly optional).",
+        inputSchema=_INPUT_SCHEMAS[UVLContent]
+    ),
+    Tool(
+        name=FlamapyOperations.ANALYZE_BATCH,
+        description="Runs several analyses on the same feature model in one call, parsing it only once. Operations taking extra arguments get them from the arguments mapping. Returns a dictionary mapping each operation name to its result.",
+        inputSchema=_INPUT_SCHEMAS[UVLContentWithOperations]
+    ),
+    Tool(
+        name=FlamapyOperations.CONFIGURATIONS_STREAM,
+        description="Streams the valid configurations of the feature model in chunks of JSON lines ({\"cfg\": {...}}), sent as progress notifications when the request has a progress token. Returns a summary ({\"sent\": n, \"exhausted\": bool}), preceded by the chunks themselves when the request has no progress token.",
+        inputSchema=_INPUT_SCHEMAS[UVLContentWithStream]
+    ),
+    Tool(
+        name=FlamapyOperations.COMMONALITY_MANY,
+        description="Measures the commonality of several features at once. Returns a dictionary mapping each feature to the share of valid configurations that include it.",
+        inputSchema=_INPUT_SCHEMAS[UVLContentWithFeatures]
+    )
+]
+
+
+# Facade operations fed only by the model (and feature names) are served from the result cache
+_run_facade_operation = _cached_result(_execute_facade_operation)
+
+
+def _run_tool(name: str, arguments: dict) -> Any:
+    """Run the analysis behind a tool and return its raw result.
+
+    The arguments are the dump of the tool's validated input model, so every field is present,
+    with the default of the model when the call left it out.
+    """
+    content = arguments["content"]
+    match name:
+        case FlamapyOperations.ATOMIC_SETS:
+            return _get_tree_metrics(content).atomic_sets
+        case FlamapyOperations.AVERAGE_BRANCHING_FACTOR:
+            return _get_tree_metrics(content).branching_factor
+        case FlamapyOperations.COMMONALITY:
+            # A single conditioned count rather than the inclusion probability of every feature
+            return _commonality(content, arguments["config_file"])
+        case FlamapyOperations.COMMONALITY_MANY:
+            return _commonality_many(content, arguments["features"])
+        case FlamapyOperations.CONFIGURATIONS:
+            return _configurations_page(content, arguments["limit"], arguments["cursor"],
+                                        arguments["format"])
+        case FlamapyOperations.CONFIGURATIONS_NUMBER:
+            # Counted on the feature tree when the model has no cross-tree constraints
+            return _configurations_number(content)
+        case FlamapyOperations.CORE_FEATURES:
+            return _get_anomalies(content).core_features
+        case FlamapyOperations.COUNT_LEAFS:
+            return _get_tree_metrics(content).leaf_count
+        case FlamapyOperations.DEAD_FEATURES:
+            return _get_anomalies(content).dead_features
+        case FlamapyOperations.ESTIMATED_NUMBER_OF_CONFIGURATIONS:
+            return _run_facade_operation(content, "estimated_number_of_configurations")
+        case FlamapyOperations.FALSE_OPTIONAL_FEATURES:
+            return _get_anomalies(content).false_optional_features
+        case FlamapyOperations.FEATURE_ANCESTORS:
+            return _feature_ancestors(content, arguments["config_file"])
+        case (FlamapyOperations.FEATURE_INCLUSION_PROBABILITY | FlamapyOperations.HOMOGENEITY |
+              FlamapyOperations.UNIQUE_FEATURES | FlamapyOperations.VARIABILITY |
+              FlamapyOperations.VARIANT_FEATURES):
+            return _count_statistic(content, name)
+        case FlamapyOperations.FILTER:
+            return _filter(content, arguments["config_file"])
+        case FlamapyOperations.LEAF_FEATURES:
+            return _get_tree_metrics(content).leaves
+        case FlamapyOperations.MAX_DEPTH:
+            return _get_tree_metrics(content).max_depth
+        case FlamapyOperations.SAMPLING:
+            return _run_framework_operation(content, "Sampling")
+        case FlamapyOperations.SATISFIABILITY:
+            return _is_satisfiable(content)
+        case FlamapyOperations.SATISFIABLE_CONFIGURATION:
+            return _is_satisfiable_configuration(content, arguments["selected_features"])
+        case FlamapyOperations.ANALYZE_BATCH:
+            operations = arguments["operations"]
+            operation_arguments = arguments["arguments"]
+            unsupported = [op for op in operations if op not in _TOOL_INPUTS or op in _UNBATCHED_OPERATIONS]
+            if unsupported:
+                raise ValueError(f"Operations not supported in a batch: {', '.join(unsupported)}")
+            unused = [op for op in operation_arguments if op not in operations]
+            if unused:
+                raise ValueError(f"Arguments given for operations not in the batch: {', '.join(unused)}")
+
+            # Every operation gets its arguments checked before any of them runs
+            batch = {op: {**operation_arguments.get(op, {}), "content": content} for op in operations}
+            batch = {op: _TOOL_INPUTS[op].model_validate(op_arguments).model_dump() for op, op_arguments in batch.items()}
+            # The model is parsed (and transformed to SAT/BDD) once, then shared through the cache
+            return {op: _dispatch(op, op_arguments) for op, op_arguments in batch.items()}
+        case _:
+            raise ValueError(f"Unknown tool name: {name}")
+
+
+def _dispatch(name: str, arguments: dict) -> Any:
+    """Run a tool, going through the persistent cache for the expensive deterministic ones"""
+    if _disk_cache is None or name not in _PERSISTED_OPERATIONS:
+        return _run_tool(name, arguments)
+
+    key = f"v{_RESULT_FORMAT_VERSION}:{_content_hash(arguments['content'])}:{name}"
     try:
-        dm = DiscoverMetamodels()
-        op = dm.use_operation_from_file(operation_name, temp_file)
-
-        # If operation requires execution
-        if hasattr(op, 'execute'):
-            # Set parameters if any were passed
-            for key, value in kwargs.items():
-                if hasattr(op, key):
-                    setattr(op, key, value)
-
-            op.execute()
-            return op.get_result()
-
-        # If result is already final
-        return op
-    except Exception as e:
-        raise Exception(f"Error executing {operation_name}: {str(e)}")
+        result = _disk_cache.get(key)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Disk cache unavailable: %s", e)
+        return _run_tool(name, arguments)
+    if result is None:
+        result = _run_tool(name, arguments)
+        try:
+            _disk_cache.set(key, result)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Could not store %s in the disk cache: %s", name, e)
+    return result
+
+
+def _run_in_worker(name: str, arguments: dict) -> str:
+    """Entry point of the worker processes: run a tool and return its result as JSON text"""
+    return _to_json(_dispatch(name, arguments))
+
+
+def _worker_count() -> int:
+    """Number of worker processes running the analyses, from FLAMAPY_MCP_WORKERS (0 runs them inline)"""
+    return int(os.environ.get("FLAMAPY_MCP_WORKERS", os.cpu_count() or 1))
+
+
+class _WorkerPool:
+    """Worker processes running the analyses, each model always being sent to the same worker.
+
+    Every worker keeps its own caches of parsed models, solvers and BDDs, so routing calls by
+    content hash keeps those caches hot instead of warming a copy in every worker. A worker
+    that dies (e.g. on a crash in a native solver) only fails its pending calls and is replaced.
+    """
+
+    def __init__(self, size: int) -> None:
+        # Workers are spawned rather than forked: a forked child would inherit the stdin lock held
+        # by the stdio transport's reader thread and deadlock when multiprocessing closes stdin.
+        self._context = multiprocessing.get_context("spawn")
+        self._executors = [self._new_executor() for _ in range(size)]
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=1, mp_context=self._context)
+
+    async def run(self, name: str, arguments: dict) -> str:
+        """Run a tool in the worker assigned to its model and return its textual result"""
+        return await self.call(arguments["content"], _run_in_worker, name, arguments)
+
+    async def call(self, content: str, func, *args) -> Any:
+        """Call func(*args) in the worker assigned to the model content"""
+        index = int(_content_hash(content), 16) % len(self._executors)
+        executor = self._executors[index]
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            # Calls pending on the dead worker all fail here; only the first one replaces it
+            if self._executors[index] is executor:
+                self._executors[index] = self._new_executor()
+                executor.shutdown(wait=False)
+            raise
+
+    def shutdown(self) -> None:
+        for executor in self._executors:
+            executor.shutdown(cancel_futures=True)
+
+
+async def _stream_configurations(pool: Optional[_WorkerPool], arguments: dict, session: Any,
+                                 progress_token: Optional[str | int]) -> list[TextContent]:
+    """Send the configurations of a model chunk by chunk as they are enumerated.
+
+    Chunks are pulled one at a time from the model's worker and each one is pushed to the client
+    as a progress notification, then dropped, so neither process holds every configuration at
+    once. Cancelling the request stops the enumeration. Without a progress token the chunks can
+    only be returned with the result, so they are kept, and capped at one chunk unless a limit
+    is given. The result ends with a summary of the configurations sent.
+    """
+    content = arguments["content"]
+    chunk_size = arguments["chunk_size"]
+    limit = arguments["limit"]
+    if limit is None and progress_token is None:
+        limit = chunk_size
+    stream_id = str(next(_stream_ids))
+    sent = 0
+    chunks = []
+    exhausted = False
+
+    async def call(func, *args) -> Any:
+        if pool is None:
+            return func(content, *args)
+        return await pool.call(content, func, content, *args)
+
+    try:
+        while not exhausted and (limit is None or sent < limit):
+            size = chunk_size if limit is None else min(chunk_size, limit - sent)
+            text, exhausted = await call(_stream_chunk, stream_id, size, sent == 0)
+            if not text:
+                break
+            sent += text.count("\n")
+            if progress_token is None:
+                chunks.append(TextContent(type="text", text=text))
+            else:
+                await session.send_progress_notification(progress_token, sent, message=text)
     finally:
-        _cleanup_temp_file(temp_file)
+        if not exhausted:
+            # Shielded, or the cancellation of the request would cancel the close as well and
+            # leave the iterator in the worker
+            with anyio.CancelScope(shield=True):
+                try:
+                    await call(_close_stream, stream_id)
+                except Exception as e:
+                    logger.warning("Could not close configurations stream %s: %s", stream_id, e)
+    return chunks + [TextContent(type="text", text=_to_json({"sent": sent, "exhausted": exhausted}))]
+
+
+def _tool_errors(func):
+    """Report any failure of a tool handler as one MCP error naming the tool.
+
+    This is the only place tool errors are wrapped: the original exception (with the remote
+    traceback of a worker process) stays chained as the cause instead of being re-stringified
+    at every layer. Errors are only wrapped here, in the server process, because McpError
+    does not survive being pickled back from a worker.
+    """
+    @functools.wraps(func)
+    async def wrapper(name: str, arguments: dict) -> Any:
+        try:
+            return await func(name, arguments)
+        except ValidationError as e:
+            raise McpError(ErrorData(code=INVALID_PARAMS, message=f"Invalid arguments for {name}: {e}")) from e
+        except Exception as e:
+            raise McpError(ErrorData(code=INTERNAL_ERROR, message=f"Error executing {name}: {e}")) from e
+
+    return wrapper
 
 
 async def serve() -> None:
     server = Server("mcp-flamapy")
 
+    # Analyses are CPU bound, so they run in worker processes: concurrent calls proceed in
+    # parallel and the event loop stays responsive.
+    workers = _worker_count()
+    pool: Optional[_WorkerPool] = None
+    if workers > 0:
+        pool = _WorkerPool(workers)
+
     @server.list_tools()
     async def list_tools() -> list[Tool]:
-        return [
-            Tool(
-                name=FlamapyOperations.ATOMIC_SETS,
-                description="Identifies atomic sets, which are groups of features that always appear together in all valid configurations.",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.AVERAGE_BRANCHING_FACTOR,
-                description="Calculates the average number of child features per parent feature, indicating model complexity.",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.COMMONALITY,
-                description="Measures the frequency of a feature in valid configurations, expressed as a percentage.",
-                inputSchema=UVLContentWithConfig.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.CONFIGURATIONS,
-                description="Generates all possible valid configurations from the feature model.",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.CONFIGURATIONS_NUMBER,
-                description="Returns the total number of valid configurations for the feature model.",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.CORE_FEATURES,
-                description="Identifies features that are present in all valid configurations (mandatory features).",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.COUNT_LEAFS,
-                description="Counts the number of leaf features (features with no children) in the model.",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.DEAD_FEATURES,
-                description="Identifies features that cannot be included in any valid configuration, often indicating model errors.",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.ESTIMATED_NUMBER_OF_CONFIGURATIONS,
-                description="Estimates the total number of configurations by considering all feature combinations, ignoring constraints.",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.FALSE_OPTIONAL_FEATURES,
-                description="Identifies features that seem optional but are mandatory due to model constraints.",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.FEATURE_ANCESTORS,
-                description="Returns all ancestor features for a given feature in the model hierarchy.",
-                inputSchema=UVLContentWithConfig.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.FEATURE_INCLUSION_PROBABILITY,
-                description="Calculates the probability of each feature being included in a random valid configuration.",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.FILTER,
-                description="Filters and selects a subset of configurations based on specified criteria.",
-                inputSchema=UVLContentWithConfig.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.HOMOGENEITY,
-                description="Measures the similarity of configurations. A higher value (closer to 1) indicates more similar configurations.",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.LEAF_FEATURES,
-                description="Identifies all leaf features in the model (features with no children).",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.MAX_DEPTH,
-                description="Finds the maximum depth of the feature tree, indicating the longest path from root to leaf.",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.SAMPLING,
-                description="Generates a sample of valid configurations from the feature model.",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.SATISFIABILITY,
-                description="Checks if the feature model is valid and can produce at least one valid configuration.",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.SATISFIABLE_CONFIGURATION,
-                description="Checks if a given configuration of selected features is valid according to the model's constraints.",
-                inputSchema=UVLContentWithSimpleConfig.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.UNIQUE_FEATURES,
-                description="Identifies features that are part of a unique variability point.",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.VARIABILITY,
-                description="Calculates the ratio of variant features to the total number of features.",
-                inputSchema=UVLContent.model_json_schema()
-            ),
-            Tool(
-                name=FlamapyOperations.VARIANT_FEATURES,
-                description="Identifies features that are neither core nor dead (i.e., truly optional).",
-                inputSchema=UVLContent.model_json_schema()
-            )
-        ]
-
-    @server.call_tool()
+        return _TOOLS
+
+    # Arguments are checked by the compiled pydantic validators of the input models rather than
+    # by the server's default jsonschema validation, which re-checks the schema on every call
+    @server.call_tool(validate_input=False)
+    @_tool_errors
     async def call_tool(name: str, arguments: dict) -> list[TextContent]:
-        match name:
-            case FlamapyOperations.ATOMIC_SETS:
-                return [TextContent(
-                    type="text",
-                    text=_run_facade_operation(arguments.get("content"), "atomic_sets")
-                )]
-            case FlamapyOperations.AVERAGE_BRANCHING_FACTOR:
-                return [TextContent(
-                    type="text",
-                    text=str(_run_facade_operation(arguments.get("content"), "average_branching_factor"))
-                )]
-            case FlamapyOperations.COMMONALITY:
-                return [TextContent(
-                    type="text",
-                    text=str(
-                        _run_facade_operation(arguments.get("content"), "commonality", arguments.get("config_file")))
-                )]
-            case FlamapyOperations.CONFIGURATIONS:
-                configs = _run_facade_operation(arguments.get("content"), "configurations")
-                return [TextContent(
-                    type="text",
-                    text=str(configs)
-                )]
-            case FlamapyOperations.CONFIGURATIONS_NUMBER:
-                return [TextContent(
-                    type="text",
-                    text=str(_run_framework_operation(arguments.get("content"), "PySATConfigurationsNumber"))
-                )]
-            case FlamapyOperations.CORE_FEATURES:
-                return [TextContent(
-                    type="text",
-                    text=str(_run_facade_operation(arguments.get("content"), "core_features"))
-                )]
-            case FlamapyOperations.COUNT_LEAFS:
-                return [TextContent(
-                    type="text",
-                    text=str(_run_facade_operation(arguments.get("content"), "count_leafs"))
-                )]
-            case FlamapyOperations.DEAD_FEATURES:
-                return [TextContent(
-                    type="text",
-                    text=str(_run_facade_operation(arguments.get("content"), "dead_features"))
-                )]
-            case FlamapyOperations.ESTIMATED_NUMBER_OF_CONFIGURATIONS:
-                return [TextContent(
-                    type="text",
-                    text=str(_run_facade_operation(arguments.get("content"), "estimated_number_of_configurations"))
-                )]
-            case FlamapyOperations.FALSE_OPTIONAL_FEATURES:
-                return [TextContent(
-                    type="text",
-                    text=str(_run_facade_operation(arguments.get("content"), "false_optional_features"))
-                )]
-            case FlamapyOperations.FEATURE_ANCESTORS:
-                return [TextContent(
-                    type="text",
-                    text=str(_run_facade_operation(arguments.get("content"), "feature_ancestors",
-                                                   arguments.get("config_file")))
-                )]
-            case FlamapyOperations.FEATURE_INCLUSION_PROBABILITY:
-                probabilities = _run_framework_operation(arguments.get("content"), "FeatureInclusionProbability")
-                formatted_probabilities = {feature: round(prob, 4) for feature, prob in probabilities.items()}
-                return [TextContent(
-                    type="text",
-                    text=str(formatted_probabilities)
-                )]
-            case FlamapyOperations.FILTER:
-                config_file = _create_temp_file(arguments.get("config_file"), ".csvconf")
-                try:
-                    filtered_configs = _run_facade_operation(arguments.get("content"), "filter", config_file)
-                    return [TextContent(
-                        type="text",
-                        text=str(filtered_configs)
-                    )]
-                finally:
-                    _cleanup_temp_file(config_file)
-            case FlamapyOperations.HOMOGENEITY:
-                return [TextContent(
-                    type="text",
-                    text=str(_run_framework_operation(arguments.get("content"), "Homogeneity"))
-                )]
-            case FlamapyOperations.LEAF_FEATURES:
-                return [TextContent(
-                    type="text",
-                    text=str(_run_facade_operation(arguments.get("content"), "leaf_features"))
-                )]
-            case FlamapyOperations.MAX_DEPTH:
-                return [TextContent(
-                    type="text",
-                    text=str(_run_facade_operation(arguments.get("content"), "max_depth"))
-                )]
-            case FlamapyOperations.SAMPLING:
-                samples = _run_framework_operation(arguments.get("content"), "Sampling")
-                return [TextContent(
-                    type="text",
-                    text=str(samples)
-                )]
-            case FlamapyOperations.SATISFIABILITY:
-                return [TextContent(
-                    type="text",
-                    text=str(_run_facade_operation(arguments.get("content"), "satisfiable"))
-                )]
-            case FlamapyOperations.SATISFIABLE_CONFIGURATION:
-                config_temp_file_path = None
-                try:
-                    config_lines = [f"{feature_name},True" for feature_name in arguments.get("selected_features")]
-                    config_content = "\n".join(config_lines)
-
-                    # Create the temporary file with the correctly formatted configuration
-                    config_temp_file_path = _create_temp_file(config_content, suffix=".csvconf")
-
-                    result = _run_facade_operation(arguments.get("content"), "satisfiable_configuration",
-                                                   config_temp_file_path, False)
-                    return [TextContent(
-                        type="text",
-                        text=str(result)
-                    )]
-                except Exception as e:
-                    raise Exception(f"Failed to check configuration satisfiability: {str(e)}")
-                finally:
-                    if config_temp_file_path:
-                        _cleanup_temp_file(config_temp_file_path)
-            case FlamapyOperations.UNIQUE_FEATURES:
-                return [TextContent(
-                    type="text",
-                    text=str(_run_framework_operation(arguments.get("content"), "UniqueFeatures"))
-                )]
-            case FlamapyOperations.VARIABILITY:
-                variability_ratio = _run_framework_operation(arguments.get("content"), "Variability")
-                return [TextContent(
-                    type="text",
-                    text=str(round(float(variability_ratio), 2))
-                )]
-            case FlamapyOperations.VARIANT_FEATURES:
-                return [TextContent(
-                    type="text",
-                    text=str(_run_framework_operation(arguments.get("content"), "VariantFeatures"))
-                )]
-            case _:
-                raise ValueError(f"Unknown tool name: {name}")
+        input_model = _TOOL_INPUTS.get(name)
+        if input_model is None:
+            raise ValueError(f"Unknown tool name: {name}")
+        # The handlers read the validated arguments, defaults included, never the raw ones
+        arguments = input_model.model_validate(arguments).model_dump()
+
+        if name == FlamapyOperations.CONFIGURATIONS_STREAM:
+            context = server.request_context
+            progress_token = context.meta.progressToken if context.meta else None
+            return await _stream_configurations(pool, arguments, context.session, progress_token)
+        if pool is None:
+            text = _run_in_worker(name, arguments)
+        else:
+            text = await pool.run(name, arguments)
+        return [TextContent(
+            type="text",
+            text=text
+        )]
 
     options = server.create_initialization_options()
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    finally:
+        if pool is not None:
+            pool.shutdown()
@@ -0,0 +1,19 @@
+"""Results of flamapy's own PySAT operations, which the server's analyses are checked against"""
+from flamapy_mcp import server
+
+
+def sat_count(content):
+    return server._run_framework_operation(content, "PySATConfigurationsNumber")
+
+
+def sat_configurations(content):
+    configurations = server._run_framework_operation(content, "PySATConfigurations")
+    return {frozenset(feature for feature, selected in configuration.elements.items() if selected)
+            for configuration in configurations}
+
+
+def sat_anomalies(content):
+    return server._FeatureAnomalies(
+        server._run_framework_operation(content, "PySATCoreFeatures"),
+        server._run_framework_operation(content, "PySATDeadFeatures"),
+        [str(feature) for feature in server._run_framework_operation(content, "PySATFalseOptionalFeatures")])
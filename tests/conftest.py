@@ -0,0 +1,17 @@
+import os
+
+# Keep the tests off the user's result cache; the disk cache tests build their own
+os.environ["FLAMAPY_MCP_CACHE_DIR"] = ""
+
+import pytest
+
+from flamapy_mcp import server
+
+
+@pytest.fixture(params=["always", "never"])
+def backend(request, monkeypatch):
+    """Analyze the models with the BDD (where it is exact) or with the SAT solver only"""
+    monkeypatch.setattr(server, "_USE_BDD", request.param)
+    server._model_cache.clear()
+    yield request.param
+    server._model_cache.clear()
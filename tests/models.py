@@ -0,0 +1,140 @@
+"""Small UVL models shared by the tests"""
+
+PIZZA_MODEL = """features
+    Pizza {abstract}
+        mandatory
+            Topping
+                or
+                    Salami
+                    Ham
+                    Mozzarella
+            Size
+                alternative
+                    Normal
+                    Big
+            Dough
+                alternative
+                    Neapolitan
+                    Sicilian
+        optional
+            CheesyCrust
+
+constraints
+    CheesyCrust => Big
+"""
+
+# A [1..2] group below an optional feature, which flamapy's BDD counts as 8 configurations instead of 7
+CARDINALITY_GROUP_MODEL = """features
+    Root
+        optional
+            A
+                [1..2]
+                    B
+                    C
+                    D
+"""
+
+CARDINALITY_GROUP_MODEL_WITH_CONSTRAINTS = """features
+    Root
+        mandatory
+            A
+                [1..2]
+                    B
+                    C
+                    D
+        optional
+            E
+constraints
+    E => B
+"""
+
+ANOMALIES_MODEL = """features
+    Root
+        mandatory
+            A
+        optional
+            B
+            C
+            D
+                optional
+                    E
+constraints
+    A => B
+    C => !A
+    E => D
+"""
+
+DEEP_MODEL = """features
+    Root
+        mandatory
+            A
+                optional
+                    A1
+                        alternative
+                            A11
+                            A12
+                                or
+                                    A121
+                                    A122
+                    A2
+                mandatory
+                    A3
+            B
+        or
+            C
+                mandatory
+                    C1
+            D
+"""
+
+# [n..m] groups, without cross-tree constraints
+GROUPS_MODEL = """features
+    Root
+        mandatory
+            A
+                [1..2]
+                    A1
+                    A2
+                        optional
+                            A21
+                            A22
+                    A3
+        optional
+            B
+                alternative
+                    B1
+                        or
+                            B11
+                            B12
+                            B13
+                    B2
+        [2..3]
+            C1
+            C2
+                mandatory
+                    C21
+            C3
+        or
+            D1
+            D2
+"""
+
+UNSATISFIABLE_MODEL = """features
+    Root
+        mandatory
+            A
+        optional
+            B
+constraints
+    A => !Root
+"""
+
+MODELS = {
+    "pizza": PIZZA_MODEL,
+    "cardinality_group": CARDINALITY_GROUP_MODEL,
+    "cardinality_group_with_constraints": CARDINALITY_GROUP_MODEL_WITH_CONSTRAINTS,
+    "anomalies": ANOMALIES_MODEL,
+    "deep": DEEP_MODEL,
+    "groups": GROUPS_MODEL,
+    "unsatisfiable": UNSATISFIABLE_MODEL,
+}
@@ -0,0 +1,15 @@
+import pytest
+
+from flamapy_mcp import server
+from tests.baseline import sat_anomalies
+from tests.models import ANOMALIES_MODEL, MODELS
+
+
+@pytest.mark.parametrize("name", MODELS)
+def test_anomalies_match_sat(backend, name):
+    content = MODELS[name]
+    assert server._get_anomalies(content) == sat_anomalies(content)
+
+
+def test_anomalies_of_a_model_with_every_kind(backend):
+    assert server._get_anomalies(ANOMALIES_MODEL) == (["Root", "A", "B"], ["C"], ["B"])
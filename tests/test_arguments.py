@@ -0,0 +1,32 @@
+import pytest
+from pydantic import ValidationError
+
+from flamapy_mcp import server
+from tests.models import GROUPS_MODEL, PIZZA_MODEL
+
+
+def _run(name, **arguments):
+    return server._run_tool(name, server._TOOL_INPUTS[name].model_validate(arguments).model_dump())
+
+
+def test_omitted_arguments_get_the_defaults_of_the_input_model():
+    page = _run("configurations", content=GROUPS_MODEL)
+    limit = server.UVLContentWithPage.model_fields["limit"].default
+    assert len(page["configurations"]) == limit
+    assert page["next_cursor"] == str(limit)
+    assert "features" not in page
+
+
+def test_batched_operations_get_the_defaults_of_their_input_model():
+    results = _run("analyze_batch", content=PIZZA_MODEL, operations=["configurations", "commonality"],
+                   arguments={"commonality": {"config_file": "Big"}})
+    assert results["configurations"] == _run("configurations", content=PIZZA_MODEL)
+    assert results["commonality"] == _run("commonality", content=PIZZA_MODEL, config_file="Big")
+
+
+def test_arguments_are_not_coerced():
+    with pytest.raises(ValidationError):
+        server.UVLContentWithPage.model_validate({"content": PIZZA_MODEL, "limit": "10"})
+    with pytest.raises(ValidationError):
+        _run("analyze_batch", content=PIZZA_MODEL, operations=["configurations"],
+             arguments={"configurations": {"limit": "10"}})
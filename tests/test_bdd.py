@@ -0,0 +1,74 @@
+"""Guards on the private flamapy and dd internals the stable configuration order relies on.
+
+_compile_bdd rewrites BDDModel._levels_variables and _bdd_configurations walks dd's low-level
+manager, with its complemented edges. If an upgrade of flamapy-bdd or dd changes them, these
+tests fail instead of page cursors silently pointing at other configurations.
+"""
+import itertools
+
+import pytest
+
+from flamapy_mcp import server
+from tests.models import MODELS
+
+BDD_MODELS = [name for name, content in MODELS.items() if server._bdd_is_exact(server._parse_fm(content))]
+
+
+def _fresh_bdd(content):
+    server._model_cache.clear()
+    return server._get_bdd(content)
+
+
+@pytest.mark.parametrize("name", BDD_MODELS)
+def test_bdd_variables_are_in_feature_order(name):
+    bdd_model = _fresh_bdd(MODELS[name])
+    variables = list(bdd_model.variables_features)
+    assert [bdd_model.var_at_level(level) for level in range(len(variables))] == variables
+    assert bdd_model.bdd.var_levels == {variable: level for level, variable in enumerate(variables)}
+
+
+def test_low_level_manager_layout():
+    bdd_model = _fresh_bdd(MODELS["pizza"])
+    manager = bdd_model.bdd._bdd
+    n_vars = len(bdd_model.variables_features)
+    # Terminals sit one level below the last variable, -1 being the complement of TRUE
+    assert manager.succ(1)[0] == n_vars
+    assert manager.false == -1 and manager.true == 1
+    root = bdd_model.root.node
+    level, low, high = manager.succ(root)
+    assert level == bdd_model.bdd.level_of_var(bdd_model.root.var)
+    # A complemented reference stands for the negation of its node
+    assert bdd_model.bdd.apply("not", bdd_model.root).node == -root
+
+
+@pytest.mark.parametrize("name", BDD_MODELS)
+def test_walk_matches_pick_iter(name):
+    bdd_model = _fresh_bdd(MODELS[name])
+    variables_features = bdd_model.variables_features
+    features = list(variables_features.values())
+    for function in (bdd_model.root, ~bdd_model.root):
+        expected = {frozenset(variables_features[var] for var, value in assignment.items() if value)
+                    for assignment in bdd_model.bdd.pick_iter(function, care_vars=set(variables_features))}
+        walked = list(server._bdd_configurations(_with_root(bdd_model, function)))
+        assert len(walked) == len(expected)
+        assert {frozenset(configuration) for configuration in walked} == expected
+        # Each feature deselected before selected, in feature order
+        bits = [tuple(feature in configuration for feature in features) for configuration in walked]
+        assert bits == sorted(bits)
+
+
+def _with_root(bdd_model, function):
+    # A view of the BDD rooted at function, without rebuilding its variables
+    view = object.__new__(type(bdd_model))
+    view.__dict__.update(bdd_model.__dict__)
+    view._root = function
+    return view
+
+
+def test_walk_skips_levels_of_variables_not_on_the_path():
+    bdd_model = _fresh_bdd(MODELS["pizza"])
+    true = bdd_model.bdd.true
+    n_vars = len(bdd_model.variables_features)
+    assert sum(1 for _ in server._bdd_configurations(_with_root(bdd_model, true))) == 2 ** n_vars
+    first, last = itertools.islice(server._bdd_configurations(_with_root(bdd_model, true)), 2)
+    assert first == {} and list(last) == [bdd_model.variables_features[bdd_model.var_at_level(n_vars - 1)]]
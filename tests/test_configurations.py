@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from flamapy_mcp import server
+from tests.baseline import sat_configurations
+from tests.models import CARDINALITY_GROUP_MODEL, CARDINALITY_GROUP_MODEL_WITH_CONSTRAINTS, MODELS, PIZZA_MODEL
+
+
+def test_cardinality_group_configurations_match_sat():
+    for content in (CARDINALITY_GROUP_MODEL, CARDINALITY_GROUP_MODEL_WITH_CONSTRAINTS):
+        configurations = [frozenset(configuration) for configuration in server._iter_configurations(content)]
+        assert len(configurations) == len(set(configurations))
+        assert set(configurations) == sat_configurations(content)
+
+
+def test_bdd_configurations_match_sat():
+    assert server._get_model(PIZZA_MODEL).use_bdd
+    configurations = [frozenset(configuration) for configuration in server._iter_configurations(PIZZA_MODEL)]
+    assert len(configurations) == len(set(configurations)) == 42
+    assert set(configurations) == sat_configurations(PIZZA_MODEL)
+
+
+@pytest.mark.parametrize("name", MODELS)
+def test_configurations_match_sat(backend, name):
+    content = MODELS[name]
+    configurations = [frozenset(configuration) for configuration in server._iter_configurations(content)]
+    assert len(configurations) == len(set(configurations))
+    assert set(configurations) == sat_configurations(content)
+
+
+def test_configurations_are_enumerated_lazily(backend):
+    configurations = server._iter_configurations(MODELS["groups"])
+    assert len(next(configurations)) > 0
+    configurations.close()
+
+
+def test_pages_do_not_depend_on_the_hash_seed():
+    # Pages are served by worker processes, each with its own hash seed
+    script = ("import sys; from flamapy_mcp import server; "
+              "print(server._to_json(server._configurations_page(sys.stdin.read(), 10, '20')))")
+    pages = {subprocess.run([sys.executable, "-c", script], input=PIZZA_MODEL, capture_output=True, text=True,
+                            check=True, env={**os.environ, "PYTHONHASHSEED": seed}).stdout
+             for seed in ("1", "2", "3")}
+    assert len(pages) == 1
@@ -0,0 +1,54 @@
+import pytest
+
+from flamapy_mcp import server
+from tests.baseline import sat_configurations, sat_count
+from tests.models import (CARDINALITY_GROUP_MODEL, CARDINALITY_GROUP_MODEL_WITH_CONSTRAINTS, GROUPS_MODEL,
+                         MODELS)
+
+
+def test_cardinality_groups_are_not_counted_on_the_bdd():
+    for content in (CARDINALITY_GROUP_MODEL, CARDINALITY_GROUP_MODEL_WITH_CONSTRAINTS):
+        assert not server._get_model(content).use_bdd
+        assert server._count(content) == sat_count(content)
+
+
+def test_bdd_count_matches_sat_count_without_cardinality_groups():
+    content = CARDINALITY_GROUP_MODEL_WITH_CONSTRAINTS.replace("[1..2]", "or")
+    assert server._get_model(content).use_bdd
+    assert server._count(content) == sat_count(content) == 11
+
+
+@pytest.mark.parametrize("name", MODELS)
+def test_feature_counts_match_sat(backend, name):
+    content = MODELS[name]
+    configurations = sat_configurations(content)
+    assert server._feature_counts(content) == {
+        feature: sum(feature in configuration for configuration in configurations)
+        for feature in server._get_model(content).features}
+
+
+@pytest.mark.parametrize("name", MODELS)
+def test_configurations_number_matches_sat(backend, name):
+    content = MODELS[name]
+    assert server._configurations_number(content) == server._count(content) == sat_count(content)
+
+
+@pytest.mark.parametrize("name", [name for name, content in MODELS.items() if "constraints" not in content])
+def test_tree_count_matches_sat(name):
+    content = MODELS[name]
+    assert server._tree_count(server._get_fm(content).fm_model) == sat_count(content)
+
+
+def test_sat_counting_is_bounded(monkeypatch):
+    monkeypatch.setattr(server, "_MAX_SAT_COUNT", 100)
+    server._model_cache.clear()
+    with pytest.raises(ValueError):
+        server._count(GROUPS_MODEL)
+    # Models without cross-tree constraints are still counted on the feature tree
+    assert server._configurations_number(GROUPS_MODEL) == 1620
+    server._model_cache.clear()
+
+
+@pytest.mark.parametrize("name", MODELS)
+def test_satisfiability_matches_sat(backend, name):
+    assert server._is_satisfiable(MODELS[name]) == (sat_count(MODELS[name]) > 0)
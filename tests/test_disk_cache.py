@@ -0,0 +1,43 @@
+from flamapy_mcp import server
+from flamapy_mcp.disk_cache import DiskCache
+from tests.baseline import sat_count
+from tests.models import GROUPS_MODEL, PIZZA_MODEL
+
+
+def test_values_survive_a_new_connection(tmp_path):
+    DiskCache(tmp_path, 1024).set("key", {"Pizza": 1.0})
+    assert DiskCache(tmp_path, 1024).get("key") == {"Pizza": 1.0}
+    assert DiskCache(tmp_path, 1024).get("other") is None
+
+
+def test_least_recently_used_values_are_evicted(tmp_path):
+    cache = DiskCache(tmp_path, 25)
+    cache.set("a", "a" * 10)
+    cache.set("b", "b" * 10)
+    cache.get("a")
+    cache.set("c", "c" * 10)
+    assert cache.get("a") == "a" * 10
+    assert cache.get("b") is None
+    assert cache.get("c") == "c" * 10
+
+
+def test_dispatch_persists_results_under_a_versioned_key(tmp_path, monkeypatch):
+    cache = DiskCache(tmp_path, 1024 ** 2)
+    monkeypatch.setattr(server, "_disk_cache", cache)
+    arguments = {"content": GROUPS_MODEL}
+    assert server._dispatch("configurations_number", arguments) == sat_count(GROUPS_MODEL)
+    key = f"v{server._RESULT_FORMAT_VERSION}:{server._content_hash(GROUPS_MODEL)}:configurations_number"
+    assert cache.get(key) == sat_count(GROUPS_MODEL)
+
+    # Results stored by an older release are not served
+    cache.set(f"{server._content_hash(PIZZA_MODEL)}:configurations_number", 0)
+    assert server._dispatch("configurations_number", {"content": PIZZA_MODEL}) == 42
+
+
+def test_one_write_ahead_logging_connection_is_kept(tmp_path):
+    cache = DiskCache(tmp_path, 1024)
+    cache.set("key", 1)
+    connection = cache._conn
+    assert cache.get("key") == 1
+    assert cache._conn is connection
+    assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
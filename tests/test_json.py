@@ -0,0 +1,7 @@
+import json
+
+from flamapy_mcp import server
+
+
+def test_json_serializes_integers_beyond_64_bits():
+    assert json.loads(server._to_json({"configurations_number": 2 ** 100})) == {"configurations_number": 2 ** 100}
@@ -0,0 +1,15 @@
+from flamapy_mcp import server
+
+
+def test_tools_are_advertised_once():
+    names = [tool.name for tool in server._TOOLS]
+    assert len(names) == len(set(names))
+
+
+def test_every_tool_has_an_input_model():
+    assert {tool.name for tool in server._TOOLS} == set(server._TOOL_INPUTS)
+    assert all(tool.inputSchema == server._INPUT_SCHEMAS[server._TOOL_INPUTS[tool.name]] for tool in server._TOOLS)
+
+
+def test_every_operation_is_a_tool():
+    assert set(server._TOOL_INPUTS) == set(server.FlamapyOperations)
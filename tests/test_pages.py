@@ -0,0 +1,49 @@
+import base64
+
+import pytest
+
+from flamapy_mcp import server
+from tests.baseline import sat_count
+from tests.models import MODELS, PIZZA_MODEL
+
+
+def _page_limit(content):
+    # A few pages per model, each page enumerating the configurations again up to its end
+    return sat_count(content) // 3 + 1
+
+
+def _all_pages(content, limit, format="dict"):
+    pages = [server._configurations_page(content, limit, None, format)]
+    while pages[-1]["next_cursor"] is not None:
+        pages.append(server._configurations_page(content, limit, pages[-1]["next_cursor"], format))
+    return pages
+
+
+@pytest.mark.parametrize("name", MODELS)
+def test_pages_cover_every_configuration_once(backend, name):
+    content = MODELS[name]
+    limit = _page_limit(content)
+    pages = _all_pages(content, limit)
+    assert all(len(page["configurations"]) <= limit for page in pages)
+    configurations = [configuration for page in pages for configuration in page["configurations"]]
+    assert configurations == list(server._iter_configurations(content))
+
+
+@pytest.mark.parametrize("name", MODELS)
+def test_bitpacked_pages_decode_to_the_dict_pages(backend, name):
+    content = MODELS[name]
+    limit = _page_limit(content)
+    for page, packed_page in zip(_all_pages(content, limit), _all_pages(content, limit, "bitpacked"), strict=True):
+        features = packed_page["features"]
+        assert features == list(server._get_model(content).features)
+        decoded = []
+        for configuration in packed_page["configurations"]:
+            bits = int.from_bytes(base64.b64decode(configuration), "little")
+            decoded.append({feature for index, feature in enumerate(features) if bits >> index & 1})
+        assert decoded == [set(configuration) for configuration in page["configurations"]]
+        assert packed_page["next_cursor"] == page["next_cursor"]
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        server._configurations_page(PIZZA_MODEL, 10, "next")
@@ -0,0 +1,32 @@
+import pytest
+
+from flamapy_mcp import server
+from tests.baseline import sat_configurations
+from tests.models import MODELS, PIZZA_MODEL
+
+
+@pytest.mark.parametrize("name", MODELS)
+def test_satisfiable_configurations_match_sat(name):
+    content = MODELS[name]
+    configurations = sat_configurations(content)
+    features = list(server._get_model(content).features)
+    for selected in [[]] + [[feature] for feature in features] + [features[:2], features[-2:], features]:
+        expected = any(configuration.issuperset(selected) for configuration in configurations)
+        # Asked twice, the second answer may come from the unsatisfiable cores of the first
+        assert server._is_satisfiable_configuration(content, selected) == expected
+        assert server._is_satisfiable_configuration(content, selected) == expected
+
+
+def test_unsatisfiable_cores_reject_larger_selections():
+    assert not server._is_satisfiable_configuration(PIZZA_MODEL, ["Normal", "CheesyCrust"])
+    model = server._get_model(PIZZA_MODEL)
+    assert model.unsat_cores
+    model.solver.delete()
+    # Rejected from the remembered core, without the (now unusable) solver
+    assert not server._is_satisfiable_configuration(PIZZA_MODEL, ["Normal", "CheesyCrust", "Ham"])
+    server._model_cache.clear()
+
+
+def test_unknown_features_are_rejected():
+    with pytest.raises(ValueError):
+        server._is_satisfiable_configuration(PIZZA_MODEL, ["Pineapple"])
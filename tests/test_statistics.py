@@ -0,0 +1,52 @@
+import pytest
+
+from flamapy_mcp import server
+from tests.models import MODELS
+
+# flamapy's statistics run on its BDD, which only encodes these models exactly
+EXACT_MODELS = [name for name, content in MODELS.items()
+                if server._bdd_is_exact(server._parse_fm(content)) and name != "unsatisfiable"]
+
+
+def _flamapy(content, operation):
+    return server._run_framework_operation(content, operation)
+
+
+@pytest.mark.parametrize("name", EXACT_MODELS)
+def test_variability_matches_flamapy(backend, name):
+    content = MODELS[name]
+    total_variability, partial_variability = _flamapy(content, "Variability")
+    assert server._count_statistic(content, "variability") == {
+        "total_variability": pytest.approx(total_variability),
+        "partial_variability": pytest.approx(partial_variability),
+    }
+
+
+def test_variability_is_not_rounded_away():
+    assert 0 < server._count_statistic(MODELS["deep"], "variability")["total_variability"] < 0.005
+
+
+@pytest.mark.parametrize("name", EXACT_MODELS)
+def test_homogeneity_matches_flamapy(backend, name):
+    content = MODELS[name]
+    assert server._count_statistic(content, "homogeneity") == pytest.approx(_flamapy(content, "Homogeneity"))
+
+
+@pytest.mark.parametrize("name", EXACT_MODELS)
+def test_feature_lists_match_flamapy(backend, name):
+    content = MODELS[name]
+    assert server._count_statistic(content, "unique_features") == _flamapy(content, "UniqueFeatures")
+    assert server._count_statistic(content, "variant_features") == _flamapy(content, "VariantFeatures")
+
+
+@pytest.mark.parametrize("name", EXACT_MODELS)
+def test_feature_inclusion_probabilities_match_flamapy(backend, name):
+    content = MODELS[name]
+    probabilities = _flamapy(content, "FeatureInclusionProbability")
+    assert server._count_statistic(content, "feature_inclusion_probability") == {
+        feature: round(probability, 4) for feature, probability in probabilities.items()}
+
+
+def test_variability_without_variant_features(backend):
+    assert server._count_statistic(MODELS["unsatisfiable"], "variability") == {
+        "total_variability": 0.0, "partial_variability": 0.0}
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import anyio
+import pytest
+
+from flamapy_mcp import server
+from tests.baseline import sat_count
+from tests.models import GROUPS_MODEL, MODELS, PIZZA_MODEL
+
+
+def _parse_chunk(text):
+    return [json.loads(line)["cfg"] for line in text.splitlines()]
+
+
+@pytest.mark.parametrize("name", MODELS)
+def test_stream_chunks_continue_the_enumeration(backend, name):
+    content = MODELS[name]
+    size = sat_count(content) // 3 + 1
+    configurations = []
+    exhausted = False
+    while not exhausted:
+        text, exhausted = server._stream_chunk(content, "test", size, not configurations)
+        configurations.extend(_parse_chunk(text))
+    assert configurations == list(server._iter_configurations(content))
+    assert "test" not in server._streams
+
+
+def test_streams_are_bounded(monkeypatch):
+    monkeypatch.setattr(server, "_MAX_STREAMS", 2)
+    for stream_id in ("first", "second"):
+        server._stream_chunk(PIZZA_MODEL, stream_id, 1, True)
+    server._stream_chunk(PIZZA_MODEL, "first", 1, False)
+    server._stream_chunk(PIZZA_MODEL, "third", 1, True)
+    # The least recently read stream made room for the new one
+    assert list(server._streams) == ["first", "third"]
+    with pytest.raises(ValueError):
+        server._stream_chunk(PIZZA_MODEL, "second", 1, False)
+    server._streams.clear()
+
+
+class _Session:
+    """Records the progress notifications sent by a stream"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def send_progress_notification(self, progress_token, progress, message=None):
+        self.messages.append(message)
+
+
+def _stream(session, progress_token, **arguments):
+    arguments = server.UVLContentWithStream.model_validate({"content": PIZZA_MODEL, **arguments}).model_dump()
+    return asyncio.run(server._stream_configurations(None, arguments, session, progress_token))
+
+
+def test_stream_with_progress_token_returns_a_summary():
+    session = _Session()
+    contents = _stream(session, "token", chunk_size=10)
+    assert [json.loads(content.text) for content in contents] == [{"sent": 42, "exhausted": True}]
+    assert len(session.messages) == 5
+    configurations = [configuration for message in session.messages for configuration in _parse_chunk(message)]
+    assert configurations == list(server._iter_configurations(PIZZA_MODEL))
+
+
+def test_stream_with_progress_token_stops_at_the_limit():
+    session = _Session()
+    contents = _stream(session, "token", chunk_size=10, limit=25)
+    assert json.loads(contents[-1].text) == {"sent": 25, "exhausted": False}
+    assert [len(_parse_chunk(message)) for message in session.messages] == [10, 10, 5]
+    assert not server._streams
+
+
+def test_stream_without_progress_token_returns_one_chunk():
+    session = _Session()
+    contents = _stream(session, None, chunk_size=10)
+    assert not session.messages
+    assert len(_parse_chunk(contents[0].text)) == 10
+    assert json.loads(contents[-1].text) == {"sent": 10, "exhausted": False}
+    assert not server._streams
+
+
+def test_stream_without_progress_token_returns_the_chunks_up_to_the_limit():
+    contents = _stream(_Session(), None, chunk_size=10, limit=100)
+    configurations = [configuration for content in contents[:-1] for configuration in _parse_chunk(content.text)]
+    assert configurations == list(server._iter_configurations(PIZZA_MODEL))
+    assert json.loads(contents[-1].text) == {"sent": 42, "exhausted": True}
+
+
+class _CancellingSession:
+    """Cancels the request once the first chunk has been sent, as a client cancelling it would"""
+
+    def __init__(self, scope):
+        self.scope = scope
+
+    async def send_progress_notification(self, progress_token, progress, message=None):
+        self.scope.cancel()
+
+
+def _stream_count(content):
+    return len(server._streams)
+
+
+def test_cancelled_stream_is_closed_in_its_worker():
+    pool = server._WorkerPool(1)
+    arguments = server.UVLContentWithStream.model_validate({"content": GROUPS_MODEL, "chunk_size": 10}).model_dump()
+
+    async def main():
+        with anyio.CancelScope() as scope:
+            await server._stream_configurations(pool, arguments, _CancellingSession(scope), "token")
+        assert scope.cancelled_caught
+        return await pool.call(GROUPS_MODEL, _stream_count, GROUPS_MODEL)
+
+    try:
+        assert anyio.run(main) == 0
+    finally:
+        pool.shutdown()
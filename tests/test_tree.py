@@ -0,0 +1,36 @@
+import pytest
+
+from flamapy_mcp import server
+from tests.models import MODELS
+
+
+@pytest.mark.parametrize("name", MODELS)
+def test_tree_metrics_match_facade(name):
+    content = MODELS[name]
+    fm = server._get_fm(content)
+    metrics = server._get_tree_metrics(content)
+    assert metrics.leaves == fm.leaf_features()
+    assert metrics.leaf_count == fm.count_leafs()
+    assert metrics.max_depth == fm.max_depth()
+    assert metrics.branching_factor == fm.average_branching_factor()
+
+
+
+@pytest.mark.parametrize("name", MODELS)
+def test_atomic_sets_match_facade(name):
+    content = MODELS[name]
+    atomic_sets = server._get_tree_metrics(content).atomic_sets
+    assert sorted(map(sorted, atomic_sets)) == sorted(map(sorted, server._get_fm(content).atomic_sets()))
+
+
+@pytest.mark.parametrize("name", MODELS)
+def test_ancestors_match_facade(name):
+    content = MODELS[name]
+    fm = server._get_fm(content)
+    for feature in server._get_model(content).features:
+        assert server._feature_ancestors(content, feature) == fm.feature_ancestors(feature)
+
+
+def test_ancestors_of_an_unknown_feature():
+    with pytest.raises(ValueError):
+        server._feature_ancestors(MODELS["pizza"], "Pineapple")